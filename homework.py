@@ -1,11 +1,17 @@
+import json
+import signal
 import sys
 import time
+from collections import deque
+from contextlib import contextmanager
+from email.utils import formatdate
+from functools import lru_cache
 from http import HTTPStatus
-from logging import StreamHandler
 
 import requests
 import os
 import logging
+import logging.config
 
 from dotenv import load_dotenv
 from telebot import TeleBot
@@ -17,15 +23,24 @@ TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 RETRY_PERIOD = 600
+MAX_RETRY_PERIOD = 1800
+IDLE_POLLS_BEFORE_BACKOFF = 3
+REQUEST_TIMEOUT = 30
+RECENT_MESSAGES_LIMIT = 64
+TELEGRAM_MESSAGE_LIMIT = 4096
+MESSAGE_SEPARATOR = '\n\n'
 ENDPOINT = ('https:'
             '//practicum.yandex.ru/api/user_api/homework_statuses/')
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+HEADERS = {'Accept': 'application/json'}
+STATE_FILE = os.getenv('STATE_FILE', 'state.json')
 
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
+VALID_STATUSES = frozenset(HOMEWORK_VERDICTS) | {'pending'}
+STATUS_MESSAGE_TEMPLATE = 'Изменился статус проверки работы "%s". %s'
 
 
 class APIRequestStatusError(RuntimeError):
@@ -53,21 +68,80 @@ class APIRequestStatusError(RuntimeError):
         super().__init__(f'{message} (Код ошибки: {error_code}')
 
 
+class RecentMessages:
+    """
+    Ограниченный набор недавно отправленных сообщений.
+    Хранит не больше maxlen сообщений: при переполнении вытесняется
+    самое старое. Проверка наличия сообщения выполняется за O(1).
+
+    Args:
+        maxlen (int, optional): Сколько последних сообщений помнить
+        (по умолчанию RECENT_MESSAGES_LIMIT).
+    """
+
+    def __init__(self, maxlen=RECENT_MESSAGES_LIMIT):
+        """
+        Инициализация RecentMessages.
+
+        :param maxlen: Сколько последних сообщений помнить.
+        """
+        self._queue = deque(maxlen=maxlen)
+        self._messages = set()
+
+    def __contains__(self, message):
+        """Проверяет, отправлялось ли сообщение недавно."""
+        return message in self._messages
+
+    def add(self, message):
+        """
+        Запоминает сообщение, вытесняя самое старое при переполнении.
+
+        :param message: Текст отправленного сообщения.
+        """
+        if message in self._messages:
+            return
+
+        if len(self._queue) == self._queue.maxlen:
+            self._messages.discard(self._queue[0])
+        self._queue.append(message)
+        self._messages.add(message)
+
+
 logger = logging.getLogger(__name__)
 
 
+LOGGING_CONFIG = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'default': {
+            'format': '%(asctime)s - %(name)s - %(levelname)s -%(message)s',
+        },
+    },
+    'handlers': {
+        'file': {
+            'class': 'logging.FileHandler',
+            'filename': 'program.log',
+            'mode': 'w',
+            'formatter': 'default',
+        },
+        'stream': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'default',
+        },
+    },
+    'loggers': {
+        __name__: {
+            'level': 'INFO',
+            'handlers': ['file', 'stream'],
+        },
+    },
+}
+
+
 def setup_logger():
-    """Настраивает логирование."""
-    logger.setLevel(logging.DEBUG)
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s -%(message)s')
-    file_handler = logging.FileHandler(
-        'program.log', mode='w')
-    file_handler.setFormatter(formatter)
-    stream_handler = StreamHandler()
-    stream_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    logger.addHandler(stream_handler)
+    """Настраивает логирование по LOGGING_CONFIG."""
+    logging.config.dictConfig(LOGGING_CONFIG)
 
 
 def check_tokens():
@@ -99,41 +173,145 @@ def check_tokens():
     logger.info('Все токены доступны')
 
 
+@contextmanager
+def sigterm_deferred():
+    """
+    Откладывает обработку SIGTERM до конца критической секции.
+    Пока секция выполняется, сигнал заблокирован и ждёт; после выхода
+    из неё handle_sigterm срабатывает как обычно. На платформах без
+    signal.pthread_sigmask секция выполняется без защиты.
+    """
+    if not hasattr(signal, 'pthread_sigmask'):
+        yield
+        return
+
+    old_mask = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM})
+    try:
+        yield
+    finally:
+        signal.pthread_sigmask(signal.SIG_SETMASK, old_mask)
+
+
+def load_timestamp():
+    """
+    Загружает сохранённую временную метку последней проверки.
+    Читает STATE_FILE, куда бот записывает current_date из ответа API,
+    чтобы после перезапуска не пропустить изменения статусов.
+
+    :return: Временная метка в формате Unix Time; текущее время,
+    если файл состояния отсутствует или повреждён. В этом случае
+    текущее время сразу сохраняется в STATE_FILE, чтобы после
+    перезапуска не пропустить изменения, случившиеся до него.
+    """
+    try:
+        with open(STATE_FILE, encoding='utf-8') as state_file:
+            return int(json.load(state_file)['timestamp'])
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, TypeError, KeyError) as error:
+        logger.warning('Не удалось прочитать %s: %s', STATE_FILE, error)
+
+    timestamp = int(time.time())
+    save_timestamp(timestamp)
+    return timestamp
+
+
+def save_timestamp(timestamp):
+    """
+    Атомарно сохраняет временную метку последней проверки в STATE_FILE.
+    Состояние пишется во временный файл, который затем заменяет
+    основной, поэтому прерванная запись не портит файл.
+
+    :param timestamp: Временная метка в формате Unix Time.
+    """
+    tmp_file = f'{STATE_FILE}.tmp'
+    try:
+        with sigterm_deferred():
+            with open(tmp_file, 'w', encoding='utf-8') as state_file:
+                json.dump({'timestamp': timestamp}, state_file)
+            os.replace(tmp_file, STATE_FILE)
+    except OSError as error:
+        logger.error('Не удалось сохранить %s: %s', STATE_FILE, error)
+
+
+def update_timestamp(response, timestamp):
+    """
+    Сдвигает временную метку на current_date из ответа API.
+    Новая метка сохраняется в STATE_FILE; если current_date
+    не является целым числом, остаётся прежняя метка.
+
+    :param response: Ответ API, преобразованный в словарь.
+    :param timestamp: Текущая временная метка в формате Unix Time.
+    :return: Временная метка для следующего запроса.
+    """
+    current_date = response.get('current_date')
+    if not isinstance(current_date, int):
+        logger.warning(
+            'Некорректный current_date в ответе API: %s', current_date)
+        return timestamp
+
+    save_timestamp(current_date)
+    return current_date
+
+
+def _headers():
+    """Собирает заголовки запроса к API с актуальным PRACTICUM_TOKEN."""
+    return {**HEADERS, 'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+
+
+@lru_cache(maxsize=1)
+def _if_modified_since(timestamp):
+    """
+    Форматирует timestamp для заголовка If-Modified-Since.
+    Метка меняется только вместе со статусами, поэтому строка
+    кешируется; она неизменяема и безопасна для повторного использования.
+    """
+    return formatdate(timestamp, usegmt=True)
+
+
 def get_api_answer(timestamp: int):
     """
     Получает ответ от API сервиса Практикум.
     Отправляет GET-запрос к API с заданной временной меткой,
     чтобы получить информацию о статусах домашних работ.
     При успешном запросе возвращает ответ в формате JSON.
+    Если сервер ответил 304 Not Modified, возвращает ответ
+    без домашних работ, не разбирая тело.
 
-    :param timestamp: Временная метка в формате Unix Time.
+    :param timestamp: Временная метка в формате Unix Time, целое число.
+    Проверяется при чтении current_date из ответа API, а не здесь.
     :return: Ответ API в формате JSON.
-    :raises TypeError: если timestamp не является целым числом.
     :raises ValueError: если API недоступен
     или произошла ошибка запроса.
     """
-    if not isinstance(timestamp, int):
-        raise TypeError(
-            f'Время: {timestamp} - должно быть в формате Unix Time')
-
     payload = {'from_date': timestamp}
+    headers = {
+        **_headers(),
+        'If-Modified-Since': _if_modified_since(timestamp)}
     try:
         api_answer = requests.get(
             ENDPOINT,
-            headers=HEADERS,
-            params=payload)
+            headers=headers,
+            params=payload,
+            timeout=REQUEST_TIMEOUT)
 
     except requests.RequestException as Error:
         raise ValueError(f'При запросе к API возникла ошибка: {Error}')
 
+    if api_answer.status_code == HTTPStatus.NOT_MODIFIED:
+        logger.debug('Ответ API: статусы не изменились')
+        return {'homeworks': [], 'current_date': timestamp}
+
     if api_answer.status_code != HTTPStatus.OK:
         raise APIRequestStatusError(
             f'Ответ API сервера != {HTTPStatus.OK}',
             error_code=api_answer.status_code)
 
-    logger.debug(f'Ответ API получен: {api_answer.json()}')
+    response = api_answer.json()
+
+    logger.debug('Ответ API получен: %s', response)
 
-    return api_answer.json()
+    return response
 
 
 def check_response(response):
@@ -148,23 +326,24 @@ def check_response(response):
         'homeworks' не является списком.
     :raises KeyError: если отсутствует ключ 'homeworks' в response.
     """
-    if not isinstance(response, dict):
+    try:
+        homeworks = response['homeworks']
+    except TypeError as error:
         raise TypeError(
             f'Response от API должен быть словарем,'
-            f' а содержит {type(response)}')
-
-    if 'homeworks' not in response:
+            f' а содержит {type(response)}') from error
+    except KeyError as error:
         raise KeyError(
-            'В ответе отсутствует ключ "homeworks"!')
+            'В ответе отсутствует ключ "homeworks"!') from error
 
-    if not isinstance(response['homeworks'], list):
+    if type(homeworks) is not list:
         raise TypeError(
             f'Ключ Homeworks должен содержать список list, '
-            f'а содержит {type(response["homeworks"])}')
+            f'а содержит {type(homeworks)}')
 
-    logger.debug(f'Ответ от API содержит {response["homeworks"]}')
+    logger.debug('Ответ от API содержит %s', homeworks)
 
-    return response['homeworks']
+    return homeworks
 
 
 def parse_status(homework):
@@ -181,31 +360,46 @@ def parse_status(homework):
     или 'status'.
     :raises ValueError: если статус домашней работы не задокументирован.
     """
-    valid_statuses = ['approved',
-                      'rejected',
-                      'pending',
-                      'reviewing']
-
-    if 'homework_name' not in homework:
+    homework_name = homework.get('homework_name')
+    if homework_name is None:
         raise KeyError(
             'Отсутствует ключ "homework_name" в домашней работе!')
 
-    try:
-        status = homework['status']
-    except KeyError:
+    status = homework.get('status')
+    if status is None:
         raise KeyError(
             'Отсутствует ключ status')
 
-    if status not in valid_statuses:
+    if status not in VALID_STATUSES:
         raise ValueError(
             f'Недокументированный статус: {status}')
 
-    homework_name = homework['homework_name']
+    return _format_verdict(homework_name, status)
+
 
+@lru_cache(maxsize=512)
+def _format_verdict(homework_name, status):
+    """Формирует сообщение о статусе работы; результат кешируется."""
     verdict = HOMEWORK_VERDICTS.get(status)
 
-    return (f'Изменился статус проверки работы'
-            f' "{homework_name}". {verdict}')
+    return STATUS_MESSAGE_TEMPLATE % (homework_name, verdict)
+
+
+def get_retry_period(idle_polls):
+    """
+    Вычисляет интервал ожидания до следующего запроса к API.
+    Пока подряд идёт не больше IDLE_POLLS_BEFORE_BACKOFF пустых
+    ответов, бот опрашивает API раз в RETRY_PERIOD. Каждый следующий
+    пустой ответ удваивает интервал, но не больше MAX_RETRY_PERIOD.
+
+    :param idle_polls: Количество пустых ответов API подряд.
+    :return: Интервал ожидания в секундах.
+    """
+    excess = idle_polls - IDLE_POLLS_BEFORE_BACKOFF
+    if excess <= 0:
+        return RETRY_PERIOD
+
+    return min(RETRY_PERIOD * 2 ** excess, MAX_RETRY_PERIOD)
 
 
 def send_message(bot, message):
@@ -217,24 +411,146 @@ def send_message(bot, message):
 
     :param bot: Экземпляр класса TeleBot.
     :param message: Текст сообщения для отправки.
-    :raises Exception: если возникла ошибка при отправке сообщения.
+    :return: True, если сообщение отправлено, иначе False.
+    Ошибки отправки логируются и наружу не пробрасываются.
     """
     try:
         bot.send_message(
-            chat_id=TELEGRAM_CHAT_ID, text=message)
-        logger.debug(
-            f'Сообщение {message} успешно отправлено')
+            chat_id=TELEGRAM_CHAT_ID, text=message,
+            timeout=REQUEST_TIMEOUT)
     except requests.exceptions.RequestException as Erors:
         logger.error(
-            f'Ошибка {Erors} при отправке сообщения')
+            'Ошибка %s при отправке сообщения', Erors)
+        return False
 
     except Exception as error:
         logger.error(
-            f'Неизвестная ошибка при отправке сообщения: {error}'
+            'Неизвестная ошибка при отправке сообщения: %s', error
         )
+        return False
 
     logger.debug(
-        f'Сообщение {message} успешно отправлено')
+        'Сообщение %s успешно отправлено', message)
+    return True
+
+
+def collect_new_messages(homeworks, last_statuses):
+    """
+    Формирует сообщения о статусах, которые ещё не отправлялись.
+    Для каждой работы помнится последний отправленный статус;
+    работа, чей статус с тех пор не изменился, пропускается без разбора.
+
+    Работы, которые не удалось разобрать, не прерывают обработку
+    остальных: ошибки по ним собираются отдельно.
+
+    :param homeworks: Список домашних работ из ответа API.
+    :param last_statuses: Словарь {id работы: последний отправленный
+    статус}.
+    :return: Кортеж из словаря {id работы: (статус, сообщение)}
+    для новых статусов и списка ошибок разбора.
+    """
+    new_messages = {}
+    errors = []
+    for homework in homeworks:
+        homework_id = homework.get('id', homework.get('homework_name'))
+        status = homework.get('status')
+
+        if last_statuses.get(homework_id) == status:
+            logger.debug('Сообщение об этом статусе уже отправлено')
+            continue
+
+        try:
+            message = parse_status(homework)
+        except (KeyError, ValueError) as error:
+            logger.error('Пропущена домашняя работа %s: %s', homework, error)
+            errors.append(error)
+            continue
+
+        new_messages[homework_id] = (status, message)
+
+    return new_messages, errors
+
+
+def _send_batch(bot, batch, last_statuses):
+    """
+    Отправляет пачку сообщений одним сообщением Telegram.
+    После успешной отправки статусы из пачки запоминаются
+    в last_statuses. SIGTERM откладывается до конца этой пары
+    действий, поэтому остановка не теряет отметку об отправке.
+
+    :param bot: Экземпляр класса TeleBot.
+    :param batch: Словарь {id работы: (статус, сообщение)}.
+    :param last_statuses: Словарь последних отправленных статусов.
+    :return: True, если сообщение отправлено, иначе False.
+    """
+    message = MESSAGE_SEPARATOR.join(text for _, text in batch.values())
+    with sigterm_deferred():
+        if not send_message(bot=bot, message=message):
+            return False
+
+        last_statuses.update(
+            (homework_id, status)
+            for homework_id, (status, _) in batch.items())
+    return True
+
+
+def send_status_messages(bot, new_messages, last_statuses):
+    """
+    Отправляет сообщения о новых статусах, объединяя их в пачки.
+    Каждая пачка не длиннее TELEGRAM_MESSAGE_LIMIT символов;
+    слишком длинное одиночное сообщение обрезается до лимита.
+
+    :param bot: Экземпляр класса TeleBot.
+    :param new_messages: Словарь {id работы: (статус, сообщение)}.
+    :param last_statuses: Словарь последних отправленных статусов.
+    :return: True, если все сообщения отправлены, иначе False.
+    """
+    batch = {}
+    batch_size = 0
+    for homework_id, (status, message) in new_messages.items():
+        message = message[:TELEGRAM_MESSAGE_LIMIT]
+        size = len(message) + (len(MESSAGE_SEPARATOR) if batch else 0)
+
+        if batch and batch_size + size > TELEGRAM_MESSAGE_LIMIT:
+            if not _send_batch(bot, batch, last_statuses):
+                return False
+            batch, size = {}, len(message)
+            batch_size = 0
+
+        batch[homework_id] = (status, message)
+        batch_size += size
+
+    return not batch or _send_batch(bot, batch, last_statuses)
+
+
+def report_error(bot, error, recent_errors):
+    """
+    Сообщает об ошибке в Telegram, если она не отправлялась недавно.
+
+    :param bot: Экземпляр класса TeleBot.
+    :param error: Исключение или текст ошибки.
+    :param recent_errors: Недавно отправленные ошибки (RecentMessages).
+    """
+    error_message = str(error)
+    if error_message not in recent_errors:
+        send_message(bot=bot, message=error_message)
+        recent_errors.add(error_message)
+
+
+def handle_sigterm(signum, frame):
+    """
+    Завершает работу бота по сигналу SIGTERM.
+    Исключение SystemExit прерывает time.sleep сразу, поэтому
+    остановка не ждёт окончания интервала между запросами, а
+    интерпретатор успевает выполнить штатное завершение. Запись
+    STATE_FILE и отправка пачки сообщений выполняются внутри
+    sigterm_deferred, поэтому сигнал не прерывает их посередине.
+
+    :param signum: Номер полученного сигнала.
+    :param frame: Текущий стековый кадр.
+    """
+    logger.info('Получен сигнал %s, останавливаем бота', signum)
+    sys.exit()
 
 
 def main():
@@ -246,57 +562,57 @@ def main():
     3. Проверка ответа от API.
     4. Извлечение статусов домашних работ
     и отправка уведомлений в Telegram.
-    5. Бесконечный цикл с интервалом ожидания RETRY_PERIOD.
+    5. Бесконечный цикл с интервалом ожидания RETRY_PERIOD, который
+    растёт до MAX_RETRY_PERIOD, пока статусы не меняются.
     """
+    try:
+        check_tokens()
+    except ValueError as error:
+        logger.critical(error)
+        sys.exit()
+
     bot = TeleBot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-    last_message = None
-    last_error_message = None
+    timestamp = load_timestamp()
+    last_statuses = {}
+    recent_errors = RecentMessages()
+    idle_polls = 0
 
     logger.info('Запускаем бота...вжух#')
 
     while True:
         try:
-            check_tokens()
-
             response_api = get_api_answer(timestamp)
 
-            timestamp = response_api.get('current_date', timestamp)
-
             homeworks = check_response(response_api)
 
             if not homeworks:
+                idle_polls += 1
                 logger.debug(
                     'Список домашних работ пуст — статус не изменился.')
 
             if homeworks:
-                for homework in homeworks:
-                    message = parse_status(homework)
+                idle_polls = 0
+                new_messages, errors = collect_new_messages(
+                    homeworks, last_statuses)
+                delivered = send_status_messages(
+                    bot, new_messages, last_statuses)
 
-                    if message != last_message:
-                        send_message(bot=bot, message=message)
-                        last_message = message
-                    else:
-                        logger.debug(
-                            'Сообщение совпадает с предыдущим отправленным')
+                for error in errors:
+                    report_error(bot, error, recent_errors)
 
-        except ValueError as error:
-            logger.critical(error)
-            sys.exit()
-            # Завершаем программу, если токены отсутствуют
+                if delivered and not errors:
+                    timestamp = update_timestamp(response_api, timestamp)
 
         except Exception as error:
             logger.error(
-                f'Ошибка в работе программы: {error}')
-
-            error_message = str(error)
-            if error_message != last_error_message:
-                send_message(bot=bot, message=error)
-                last_error_message = error_message
+                'Ошибка в работе программы: %s', error)
+            report_error(bot, error, recent_errors)
 
-        time.sleep(RETRY_PERIOD)
+        retry_period = get_retry_period(idle_polls)
+        time.sleep(retry_period)
 
 
 if __name__ == '__main__':
     setup_logger()
+    signal.signal(signal.SIGTERM, handle_sigterm)
     main()
@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 import pytest_timeout
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -53,3 +54,12 @@ pytest_timeout.write = write_timeout_reasons
 os.environ['PRACTICUM_TOKEN'] = 'sometoken'
 os.environ['TELEGRAM_TOKEN'] = '1234:abcdefg'
 os.environ['TELEGRAM_CHAT_ID'] = '12345'
+
+
+@pytest.fixture(autouse=True)
+def isolated_state_file(monkeypatch, tmp_path):
+    """Keep the bot's checkpoint file out of the repository root."""
+    import homework
+    state_file = tmp_path / 'state.json'
+    monkeypatch.setattr(homework, 'STATE_FILE', str(state_file))
+    return state_file
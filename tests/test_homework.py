@@ -0,0 +1,409 @@
+import json
+import logging
+import os
+import signal
+from http import HTTPStatus
+
+import pytest
+import requests
+
+import tests.check_utils as check_utils
+
+
+class MockNotModifiedResponse(check_utils.MockResponseGET):
+    def json(self):
+        raise AssertionError('304 response body must not be decoded')
+
+
+def run_main(monkeypatch, homework_module, responses, failed_sends=0):
+    """
+    Run main() for len(responses) polls and collect what it did.
+
+    Each element of responses is the JSON body of one API answer; the
+    first failed_sends calls to send_message report a delivery failure.
+    Returns the texts delivered by send_message, the sleep intervals and
+    the from_date sent with every request.
+    """
+    monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', 'sometoken')
+    monkeypatch.setattr(homework_module, 'TELEGRAM_TOKEN', '1234:abcdefg')
+    monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '12345')
+    monkeypatch.setattr(
+        homework_module, 'TeleBot', check_utils.MockTelegramBot)
+
+    bodies = iter(responses)
+    sent = []
+    sleeps = []
+    from_dates = []
+    failures = iter(range(failed_sends))
+
+    def mock_response_get(*args, **kwargs):
+        from_dates.append(kwargs['params']['from_date'])
+        return check_utils.MockResponseGET(
+            *args, data=next(bodies), **kwargs)
+
+    def mock_send_message(bot, message):
+        if next(failures, None) is not None:
+            return False
+        sent.append(message)
+        return True
+
+    def mock_sleep(secs):
+        sleeps.append(secs)
+        if len(sleeps) == len(responses):
+            raise check_utils.BreakInfiniteLoop('break')
+
+    monkeypatch.setattr(requests, 'get', mock_response_get)
+    monkeypatch.setattr(homework_module, 'send_message', mock_send_message)
+    monkeypatch.setattr(homework_module.time, 'sleep', mock_sleep)
+
+    with pytest.raises(check_utils.BreakInfiniteLoop):
+        homework_module.main()
+    return sent, sleeps, from_dates
+
+
+def homework_answer(status, current_date, homework_id=1):
+    return {
+        'homeworks': [{
+            'id': homework_id,
+            'homework_name': f'hw{homework_id}.zip',
+            'status': status,
+        }],
+        'current_date': current_date,
+    }
+
+
+def empty_answer(current_date):
+    return {'homeworks': [], 'current_date': current_date}
+
+
+def test_get_retry_period(homework_module):
+    retry_period = homework_module.RETRY_PERIOD
+    threshold = homework_module.IDLE_POLLS_BEFORE_BACKOFF
+    for idle_polls in range(threshold + 1):
+        assert homework_module.get_retry_period(idle_polls) == retry_period
+    assert (
+        homework_module.get_retry_period(threshold + 1) == retry_period * 2
+    )
+    for idle_polls in (threshold + 2, threshold + 10, 10 ** 5):
+        assert (
+            homework_module.get_retry_period(idle_polls)
+            == homework_module.MAX_RETRY_PERIOD
+        )
+
+
+def test_main_resets_retry_period_after_change(
+        monkeypatch, homework_module
+):
+    responses = [empty_answer(100 + i) for i in range(5)]
+    responses.append(homework_answer('approved', 200))
+    responses.append(empty_answer(300))
+
+    _, sleeps, _ = run_main(monkeypatch, homework_module, responses)
+
+    assert sleeps == [600, 600, 600, 1200, 1800, 600, 600]
+
+
+def test_load_timestamp_missing_file(
+        monkeypatch, homework_module, isolated_state_file
+):
+    monkeypatch.setattr(homework_module.time, 'time', lambda: 1234.5)
+    assert not isolated_state_file.exists()
+    assert homework_module.load_timestamp() == 1234
+    assert json.loads(isolated_state_file.read_text(encoding='utf-8')) == {
+        'timestamp': 1234
+    }
+
+
+def test_load_timestamp_corrupt_file(
+        monkeypatch, homework_module, isolated_state_file
+):
+    monkeypatch.setattr(homework_module.time, 'time', lambda: 1234.5)
+    for content in ('not json', '[]', '{}', '{"timestamp": "abc"}'):
+        isolated_state_file.write_text(content, encoding='utf-8')
+        assert homework_module.load_timestamp() == 1234
+        assert homework_module.load_timestamp() == 1234
+
+
+def test_save_and_load_timestamp(homework_module, isolated_state_file):
+    homework_module.save_timestamp(1000198000)
+    assert json.loads(isolated_state_file.read_text(encoding='utf-8')) == {
+        'timestamp': 1000198000
+    }
+    assert not isolated_state_file.with_name('state.json.tmp').exists()
+    assert homework_module.load_timestamp() == 1000198000
+
+
+def test_get_api_answer_not_modified(
+        monkeypatch, current_timestamp, homework_module
+):
+    def mock_response_get(*args, **kwargs):
+        return MockNotModifiedResponse(
+            *args, http_status=HTTPStatus.NOT_MODIFIED, **kwargs
+        )
+
+    monkeypatch.setattr(requests, 'get', mock_response_get)
+    assert homework_module.get_api_answer(current_timestamp) == {
+        'homeworks': [],
+        'current_date': current_timestamp
+    }
+
+
+def test_main_reports_status_returning_to_previous_value(
+        monkeypatch, homework_module
+):
+    statuses = ['reviewing', 'rejected', 'reviewing', 'rejected', 'approved']
+    responses = [
+        homework_answer(status, 1000 + i)
+        for i, status in enumerate(statuses)
+    ]
+    responses.insert(2, homework_answer('rejected', 1001))
+
+    sent, _, _ = run_main(monkeypatch, homework_module, responses)
+
+    assert [
+        next(
+            status for status, verdict in
+            homework_module.HOMEWORK_VERDICTS.items()
+            if message.endswith(verdict)
+        )
+        for message in sent
+    ] == statuses
+
+
+def test_main_keeps_checkpoint_until_message_is_sent(
+        monkeypatch, homework_module, isolated_state_file
+):
+    homework_module.save_timestamp(500)
+    responses = [
+        homework_answer('approved', 1000),
+        homework_answer('approved', 1100),
+        empty_answer(1200),
+    ]
+
+    sent, _, from_dates = run_main(
+        monkeypatch, homework_module, responses, failed_sends=1)
+
+    assert from_dates == [500, 500, 1100]
+    assert len(sent) == 1
+    assert sent[0].endswith(homework_module.HOMEWORK_VERDICTS['approved'])
+    assert homework_module.load_timestamp() == 1100
+
+
+def test_main_skips_only_invalid_homework(monkeypatch, homework_module):
+    response = homework_answer('approved', 1000)
+    response['homeworks'].insert(0, {
+        'id': 2, 'homework_name': 'hw2.zip', 'status': 'unknown'
+    })
+
+    sent, _, _ = run_main(monkeypatch, homework_module, [response])
+
+    assert len(sent) == 2
+    assert '"hw1.zip"' in sent[0]
+    assert 'hw2.zip' not in sent[0]
+    assert 'unknown' in sent[1]
+
+
+def test_send_status_messages_splits_at_limit(
+        monkeypatch, homework_module
+):
+    limit = homework_module.TELEGRAM_MESSAGE_LIMIT
+    sent = []
+
+    def mock_send_message(bot, message):
+        sent.append(message)
+        return True
+
+    monkeypatch.setattr(homework_module, 'send_message', mock_send_message)
+    new_messages = {
+        homework_id: ('approved', 'x' * (limit // 4))
+        for homework_id in range(5)
+    }
+    new_messages[5] = ('rejected', 'y' * (limit + 10))
+    last_statuses = {}
+
+    assert homework_module.send_status_messages(
+        None, new_messages, last_statuses)
+
+    assert all(len(message) <= limit for message in sent)
+    assert len(sent) == 3
+    assert sent[-1] == 'y' * limit
+    assert last_statuses == {
+        homework_id: status
+        for homework_id, (status, _) in new_messages.items()
+    }
+
+
+def test_send_status_messages_records_only_sent_batches(
+        monkeypatch, homework_module
+):
+    limit = homework_module.TELEGRAM_MESSAGE_LIMIT
+    results = iter([True, False])
+    monkeypatch.setattr(
+        homework_module, 'send_message',
+        lambda bot, message: next(results))
+    new_messages = {
+        1: ('approved', 'x' * limit),
+        2: ('rejected', 'y' * limit),
+    }
+    last_statuses = {}
+
+    assert not homework_module.send_status_messages(
+        None, new_messages, last_statuses)
+    assert last_statuses == {1: 'approved'}
+
+
+def test_recent_messages_evicts_oldest(homework_module):
+    recent = homework_module.RecentMessages(maxlen=2)
+    recent.add('A')
+    recent.add('B')
+    recent.add('A')
+    assert 'A' in recent and 'B' in recent
+
+    recent.add('C')
+    assert 'A' not in recent
+    assert 'B' in recent and 'C' in recent
+
+
+def test_main_does_not_resend_recent_error(monkeypatch, homework_module):
+    responses = [
+        {'current_date': 1000},
+        {'homeworks': {}, 'current_date': 1000},
+        {'current_date': 1000},
+    ]
+
+    sent, _, _ = run_main(monkeypatch, homework_module, responses)
+
+    assert len(sent) == 2
+    assert 'homeworks' in sent[0]
+    assert 'list' in sent[1]
+
+
+def test_get_api_answer_uses_current_token(
+        monkeypatch, current_timestamp, homework_module
+):
+    headers = []
+
+    def mock_response_get(*args, **kwargs):
+        headers.append(kwargs['headers'])
+        return check_utils.MockResponseGET(*args, **kwargs)
+
+    monkeypatch.setattr(requests, 'get', mock_response_get)
+    monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', 'first')
+    homework_module.get_api_answer(current_timestamp)
+    monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', 'second')
+    homework_module.get_api_answer(current_timestamp)
+
+    assert headers[0]['Authorization'] == 'OAuth first'
+    assert headers[1]['Authorization'] == 'OAuth second'
+    assert headers[0] is not headers[1]
+
+
+def test_main_saves_start_timestamp_without_changes(
+        monkeypatch, homework_module, isolated_state_file
+):
+    monkeypatch.setattr(homework_module.time, 'time', lambda: 1234.5)
+
+    _, _, from_dates = run_main(
+        monkeypatch, homework_module, [empty_answer(1300), empty_answer(1400)])
+
+    assert from_dates == [1234, 1234]
+    assert homework_module.load_timestamp() == 1234
+
+
+def test_main_reports_invalid_homework_and_keeps_checkpoint(
+        monkeypatch, homework_module, isolated_state_file
+):
+    homework_module.save_timestamp(500)
+    responses = [
+        homework_answer('weird', 999),
+        homework_answer('weird', 1000),
+        homework_answer('approved', 1100),
+    ]
+
+    sent, _, from_dates = run_main(monkeypatch, homework_module, responses)
+
+    assert from_dates == [500, 500, 500]
+    assert len(sent) == 2
+    assert 'Недокументированный статус: weird' in sent[0]
+    assert sent[1].endswith(homework_module.HOMEWORK_VERDICTS['approved'])
+    assert homework_module.load_timestamp() == 1100
+
+
+@pytest.mark.parametrize('current_date', ['abc', None])
+def test_main_ignores_invalid_current_date(
+        monkeypatch, homework_module, isolated_state_file, current_date
+):
+    homework_module.save_timestamp(500)
+    responses = [
+        homework_answer('approved', current_date),
+        empty_answer(1000),
+    ]
+
+    sent, _, from_dates = run_main(monkeypatch, homework_module, responses)
+
+    assert len(sent) == 1
+    assert from_dates == [500, 500]
+    assert homework_module.load_timestamp() == 500
+
+
+def test_handle_sigterm_exits_and_logs(caplog, homework_module):
+    with caplog.at_level(logging.INFO, logger=homework_module.logger.name):
+        with pytest.raises(SystemExit):
+            homework_module.handle_sigterm(signal.SIGTERM, None)
+    assert any(
+        record.levelno == logging.INFO and record.args == (signal.SIGTERM,)
+        for record in caplog.records
+    )
+
+
+def test_sigterm_deferred_until_critical_section_ends(homework_module):
+    old_handler = signal.signal(
+        signal.SIGTERM, homework_module.handle_sigterm)
+    steps = []
+    try:
+        with pytest.raises(SystemExit):
+            with homework_module.sigterm_deferred():
+                os.kill(os.getpid(), signal.SIGTERM)
+                steps.append('after kill')
+    finally:
+        signal.signal(signal.SIGTERM, old_handler)
+    assert steps == ['after kill']
+
+
+def test_send_message_passes_timeout(monkeypatch, homework_module):
+    calls = []
+
+    class RecordingBot:
+        def send_message(self, **kwargs):
+            calls.append(kwargs)
+
+    monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '12345')
+
+    assert homework_module.send_message(RecordingBot(), 'text')
+    assert calls == [{
+        'chat_id': '12345',
+        'text': 'text',
+        'timeout': homework_module.REQUEST_TIMEOUT,
+    }]
+
+
+def test_get_api_answer_builds_fresh_request_arguments(
+        monkeypatch, homework_module
+):
+    calls = []
+
+    def mock_response_get(*args, **kwargs):
+        calls.append(kwargs)
+        return check_utils.MockResponseGET(*args, **kwargs)
+
+    monkeypatch.setattr(requests, 'get', mock_response_get)
+    homework_module.get_api_answer(86400)
+    calls[0]['headers']['X-Test'] = 'mutated'
+    calls[0]['params']['from_date'] = 0
+    homework_module.get_api_answer(86400)
+
+    assert calls[1]['params'] == {'from_date': 86400}
+    assert 'X-Test' not in calls[1]['headers']
+    assert calls[1]['headers']['If-Modified-Since'] == (
+        'Fri, 02 Jan 1970 00:00:00 GMT'
+    )